@@ -1,16 +1,39 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
 import joblib
 import pandas as pd
 import numpy as np
 import os
+import sys
 from typing import Optional
 
+# Resolve sibling modules and data relative to this file, so the app imports the same
+# way from api/ (uvicorn app:app) and from the repo root (uvicorn api.app:app)
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(API_DIR)
+sys.path[:0] = [API_DIR, ROOT_DIR]
+from jobs import JobQueue
+import resource_config
+from prediction_store import DEFAULT_SOURCE, PredictionStore, model_version
+
+# Cap BLAS/OpenMP pools to this worker's share of the serving budget
+resource_config.configure_serving()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the background scoring workers for the lifetime of the app"""
+    job_queue.start()
+    yield
+    job_queue.stop()
+
 app = FastAPI(
     title="Burnout Prediction API",
     description="API for predicting employee burnout risk",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -22,19 +45,48 @@ app.add_middleware(
 )
 
 # Load model and scaler on startup
-MODEL_PATH = "../models/burnout_prediction_model.pkl"
-LOWER_MODEL_PATH = "../models/lower_quantile_model.pkl"
-UPPER_MODEL_PATH = "../models/upper_quantile_model.pkl"
-SCALER_PATH = "../models/feature_scaler.pkl"
+# Set BEAM_MODEL_VARIANT=compressed to serve the output of model_compression.py
+MODEL_VARIANT = os.environ.get("BEAM_MODEL_VARIANT", "original")
+MODEL_PREFIX = "compressed_" if MODEL_VARIANT == "compressed" else ""
+
+MODELS_DIR = os.path.join(ROOT_DIR, "models")
+MODEL_PATH = os.path.join(MODELS_DIR, f"{MODEL_PREFIX}burnout_prediction_model.pkl")
+LOWER_MODEL_PATH = os.path.join(MODELS_DIR, f"{MODEL_PREFIX}lower_quantile_model.pkl")
+UPPER_MODEL_PATH = os.path.join(MODELS_DIR, f"{MODEL_PREFIX}upper_quantile_model.pkl")
+SCALER_PATH = os.path.join(MODELS_DIR, "feature_scaler.pkl")
+JOBS_DIR = os.path.join(ROOT_DIR, "jobs")
+PREDICTION_STORE_PATH = os.path.join(ROOT_DIR, "outputs", "predictions.db")
+JOB_CHUNK_SIZE = 5000
+# Background jobs score with their own single-threaded model copies so they never
+# take cores from request handlers, parallelism comes from BEAM_JOB_WORKERS
+JOB_MODEL_THREADS = 1
+
+FEATURE_COLUMNS = ['is_male', 'is_service', 'wfh_available', 'Designation',
+                   'Resource Allocation', 'Mental Fatigue Score']
+NUMERIC_COLUMNS = ['Resource Allocation', 'Mental Fatigue Score']
+API_TO_FEATURE_COLUMNS = {
+    'designation': 'Designation',
+    'resource_allocation': 'Resource Allocation',
+    'mental_fatigue': 'Mental Fatigue Score'
+}
+RAW_CATEGORICAL_COLUMNS = ['Gender', 'Company Type', 'WFH Setup Available']
 
 try:
     model = joblib.load(MODEL_PATH)
     lower_model = joblib.load(LOWER_MODEL_PATH)
     upper_model = joblib.load(UPPER_MODEL_PATH)
-    print(f"Models loaded successfully from models directory")
+    # Request handlers resize the serving models' thread pools (configure_model_threads),
+    # job workers get separate instances whose n_jobs never changes
+    job_models = tuple(
+        joblib.load(path).set_params(n_jobs=JOB_MODEL_THREADS)
+        for path in (MODEL_PATH, LOWER_MODEL_PATH, UPPER_MODEL_PATH)
+    )
+    MODEL_VERSION = f"{MODEL_VARIANT}-{model_version(MODEL_PATH)}"
+    print(f"Models ({MODEL_VERSION}) loaded successfully from models directory")
 except Exception as e:
     print(f"Error loading models: {e}")
-    model = None
+    model = lower_model = upper_model = job_models = None
+    MODEL_VERSION = None
 
 try:
     scaler = joblib.load(SCALER_PATH)
@@ -61,6 +113,36 @@ class HealthResponse(BaseModel):
     model_loaded: bool
     scaler_loaded: bool
 
+class StoredPrediction(BaseModel):
+    employee_id: str
+    run_id: int
+    model_version: str
+    scored_at: float
+    predicted_burn_rate: float
+    lower_bound: Optional[float] = None
+    upper_bound: Optional[float] = None
+    confidence_score: Optional[float] = None
+    risk_category: str
+
+class ScoringRun(BaseModel):
+    run_id: int
+    model_version: str
+    source: Optional[str] = None
+    n_rows: int
+    completed: bool
+    scored_at: float
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str  # queued, running, completed, failed or cancelled
+    filename: Optional[str] = None
+    total_rows: int
+    processed_rows: int
+    progress: float
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
 def categorize_burnout_risk(burn_rate: float) -> str:
     """Categorize burnout risk based on burn rate"""
     if burn_rate <= 0.3:
@@ -70,6 +152,119 @@ def categorize_burnout_risk(burn_rate: float) -> str:
     else:
         return 'High Risk'
 
+# n_jobs currently set on the serving models, tracked here because get_params()
+# is too slow to call on every request
+model_threads = None
+
+def configure_model_threads(n_rows: int) -> None:
+    """Size the XGBoost thread pools for a prediction of n_rows rows"""
+    global model_threads
+    threads = resource_config.prediction_threads(n_rows)
+    if threads == model_threads:
+        return
+    for m in (model, lower_model, upper_model):
+        if m is not None:
+            m.set_params(n_jobs=threads)
+    model_threads = threads
+
+configure_model_threads(1)
+
+def predict_features(features: pd.DataFrame, models: Optional[tuple] = None):
+    """
+    Scale model features and return predictions, interval bounds and confidences.
+    `models` is a (model, lower_model, upper_model) triple, the serving models by default.
+    """
+    point_model, lower_quantile_model, upper_quantile_model = models or (model, lower_model, upper_model)
+    features = features.copy()
+    features[NUMERIC_COLUMNS] = scaler.transform(features[NUMERIC_COLUMNS])
+
+    predictions = np.clip(point_model.predict(features), 0, 1)
+    lower_bounds = lower_quantile_model.predict(features)
+    upper_bounds = upper_quantile_model.predict(features)
+
+    # Confidence is inversely proportional to the prediction interval width
+    interval_widths = np.abs(upper_bounds - lower_bounds)
+    confidences = np.clip(1.0 - interval_widths, 0.0, 1.0)
+    return predictions, lower_bounds, upper_bounds, confidences
+
+def to_feature_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert an uploaded CSV chunk to model features.
+    Accepts the raw dataset columns (as in input/test.csv), the API field names
+    or the encoded training column names.
+    """
+    df = df.rename(columns=API_TO_FEATURE_COLUMNS)
+    if 'is_male' not in df.columns and all(col in df.columns for col in RAW_CATEGORICAL_COLUMNS):
+        # Map explicitly rather than get_dummies, a chunk may hold a single category
+        df = df.assign(
+            is_male=(df['Gender'] == 'Male').astype(int),
+            is_service=(df['Company Type'] == 'Service').astype(int),
+            wfh_available=(df['WFH Setup Available'] == 'Yes').astype(int)
+        )
+
+    missing = [col for col in FEATURE_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    return df[FEATURE_COLUMNS].astype(float)
+
+def score_job_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Score one chunk of a background job with the job workers' model copies"""
+    if job_models is None or scaler is None:
+        raise RuntimeError("Model or scaler not loaded")
+
+    predictions, lower_bounds, upper_bounds, confidences = predict_features(
+        to_feature_frame(chunk), job_models
+    )
+    results = pd.DataFrame({
+        'Predicted_Burn_Rate': predictions,
+        'Lower_Bound': lower_bounds,
+        'Upper_Bound': upper_bounds,
+        'Confidence_Score': confidences,
+        'Risk_Category': [categorize_burnout_risk(pred) for pred in predictions]
+    })
+    if 'Employee ID' in chunk.columns:
+        results.insert(0, 'Employee ID', chunk['Employee ID'].values)
+    return results
+
+prediction_store = PredictionStore(PREDICTION_STORE_PATH)
+
+def record_job_results(job_id: str) -> None:
+    """
+    Record a completed job in the prediction store if it carries Employee IDs.
+    The run only becomes visible to queries once all of its rows are stored.
+    """
+    result_path = job_queue.result_path(job_id)
+    if 'Employee ID' not in pd.read_csv(result_path, nrows=0).columns:
+        return
+
+    run_id = prediction_store.start_run(MODEL_VERSION, source=f"job:{job_id}")
+    for chunk in pd.read_csv(result_path, chunksize=JOB_CHUNK_SIZE, dtype={'Employee ID': str}):
+        prediction_store.add_predictions(run_id, chunk)
+    prediction_store.complete_run(run_id)
+
+job_queue = JobQueue(
+    JOBS_DIR,
+    score_job_chunk,
+    validate_chunk=to_feature_frame,
+    on_complete=record_job_results,
+    n_workers=resource_config.job_workers(),
+    chunk_size=JOB_CHUNK_SIZE
+)
+
+def job_response(job: dict) -> JobResponse:
+    """Build the API response for a job row"""
+    return JobResponse(
+        job_id=job['id'],
+        status=job['status'],
+        filename=job['filename'],
+        total_rows=job['total_rows'],
+        processed_rows=job['processed_rows'],
+        progress=job['processed_rows'] / job['total_rows'] if job['total_rows'] else 1.0,
+        error=job['error'],
+        created_at=job['created_at'],
+        updated_at=job['updated_at']
+    )
+
 def validate_input(employee: EmployeeData) -> None:
     """Validate input parameters"""
     if employee.designation < 0 or employee.designation > 5:
@@ -139,6 +334,7 @@ async def predict_burnout(employee: EmployeeData):
         data[numeric_cols] = scaler.transform(data[numeric_cols])
         
         # Make prediction
+        configure_model_threads(len(data))
         prediction = model.predict(data)[0]
         
         # Ensure prediction is in valid range [0, 1]
@@ -177,8 +373,9 @@ async def predict_burnout_batch(employees: list[EmployeeData]):
     if scaler is None:
         raise HTTPException(status_code=500, detail="Scaler not loaded")
     
-    if len(employees) > 100:
-        raise HTTPException(status_code=400, detail="Maximum 100 employees per batch request")
+    if len(employees) > resource_config.MAX_BATCH_ROWS:
+        raise HTTPException(status_code=400,
+                            detail=f"Maximum {resource_config.MAX_BATCH_ROWS} employees per batch request")
     
     try:
         # Create a single DataFrame for efficiency
@@ -198,18 +395,9 @@ async def predict_burnout_batch(employees: list[EmployeeData]):
             'Mental Fatigue Score': df['mental_fatigue']
         })
         
-        # Apply scaling to the entire batch
-        numeric_cols = ['Resource Allocation', 'Mental Fatigue Score']
-        df_training[numeric_cols] = scaler.transform(df_training[numeric_cols])
-        
-        # Get all predictions at once
-        predictions = np.clip(model.predict(df_training), 0, 1)
-        lower_bounds = lower_model.predict(df_training)
-        upper_bounds = upper_model.predict(df_training)
-        
-        # Calculate all confidence scores
-        interval_widths = np.abs(upper_bounds - lower_bounds)
-        confidences = np.maximum(0.0, 1.0 - interval_widths)
+        # Scale and predict the entire batch at once
+        configure_model_threads(len(df_training))
+        predictions, _, _, confidences = predict_features(df_training)
         
         # Build response
         response = [
@@ -225,6 +413,102 @@ async def predict_burnout_batch(employees: list[EmployeeData]):
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Batch prediction error: {str(e)}")
 
+@app.post("/jobs", response_model=JobResponse, status_code=202, summary="Submit a background scoring job")
+def submit_job(file: UploadFile = File(...)):
+    """
+    Queue a CSV file for background scoring and return its job ID.
+    The file may use the raw dataset columns, the API field names or the training
+    column names; an `Employee ID` column is carried through to the result.
+    Empty files are rejected.
+    """
+    # Plain def, like the other job and store handlers: blocking file and SQLite work
+    # runs in FastAPI's threadpool instead of stalling the event loop
+    if model is None or scaler is None:
+        raise HTTPException(status_code=500, detail="Model or scaler not loaded")
+
+    try:
+        job_id = job_queue.submit(file.file, filename=file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid job input: {str(e)}")
+
+    return job_response(job_queue.get(job_id))
+
+@app.get("/jobs/{job_id}", response_model=JobResponse, summary="Get job status and progress")
+def get_job(job_id: str):
+    """Get the status and progress of a background scoring job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job)
+
+@app.get("/jobs/{job_id}/result", summary="Download job results")
+def get_job_result(job_id: str):
+    """Download the scored CSV of a completed job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job['status'] != 'completed':
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}, results not available")
+
+    return FileResponse(job_queue.result_path(job_id), media_type="text/csv",
+                        filename=f"burnout_predictions_{job_id}.csv")
+
+@app.post("/jobs/{job_id}/cancel", response_model=JobResponse, summary="Cancel a job")
+def cancel_job(job_id: str):
+    """Cancel a queued job, or stop a running job after its current chunk"""
+    job = job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job)
+
+@app.get("/predictions/runs", response_model=list[ScoringRun], summary="List scoring runs")
+def list_runs(limit: int = Query(50, ge=1, le=1000)):
+    """List recorded scoring runs, most recent first, including runs still being stored"""
+    return prediction_store.runs(limit)
+
+@app.get("/predictions/top", response_model=list[StoredPrediction], summary="Top at-risk employees")
+def top_at_risk(
+    k: int = Query(50, ge=1, le=10000),
+    run_id: Optional[int] = None,
+    risk_category: Optional[str] = None,
+    min_confidence: Optional[float] = Query(None, ge=0, le=1),
+    source: str = DEFAULT_SOURCE
+):
+    """
+    Employees with the highest predicted burn rate in a scoring run (the latest
+    completed run from `source` unless `run_id` is given), optionally filtered by
+    risk category and minimum confidence.
+    """
+    return prediction_store.top_at_risk(k, run_id, risk_category, min_confidence, source)
+
+@app.get("/predictions/range", response_model=list[StoredPrediction], summary="Predictions in a burn rate range")
+def predictions_in_range(
+    min_burn_rate: float = Query(0.0, ge=0, le=1),
+    max_burn_rate: float = Query(1.0, ge=0, le=1),
+    run_id: Optional[int] = None,
+    risk_category: Optional[str] = None,
+    min_confidence: Optional[float] = Query(None, ge=0, le=1),
+    limit: int = Query(1000, ge=1, le=100000),
+    source: str = DEFAULT_SOURCE
+):
+    """
+    Predictions with a burn rate between the given bounds in a scoring run
+    (the latest completed run from `source` unless `run_id` is given)
+    """
+    if min_burn_rate > max_burn_rate:
+        raise HTTPException(status_code=400, detail="min_burn_rate must not exceed max_burn_rate")
+    return prediction_store.in_range(min_burn_rate, max_burn_rate, run_id, risk_category,
+                                     min_confidence, limit, source)
+
+@app.get("/predictions/employee/{employee_id}", response_model=list[StoredPrediction],
+         summary="Prediction history of an employee")
+def employee_history(employee_id: str, limit: int = Query(100, ge=1, le=10000)):
+    """All predictions for one employee in completed runs, newest run first"""
+    history = prediction_store.employee_history(employee_id, limit)
+    if not history:
+        raise HTTPException(status_code=404, detail="No predictions recorded for this employee")
+    return history
+
 @app.get("/model/info", summary="Get model information")
 async def model_info():
     """Get information about the loaded model"""
@@ -234,9 +518,14 @@ async def model_info():
     return {
         "model_type": str(type(model).__name__),
         "feature_count": model.n_features_in_ if hasattr(model, 'n_features_in_') else "unknown",
+        "model_variant": MODEL_VARIANT,
+        "model_version": MODEL_VERSION,
         "model_path": MODEL_PATH
     }
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Export the worker count so every worker sizes its thread pools from the real number
+    workers = resource_config.api_workers()
+    resource_config.set_api_workers(workers)
+    uvicorn.run("app:app", host="0.0.0.0", port=8000, workers=workers)
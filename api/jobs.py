@@ -0,0 +1,264 @@
+"""
+Background scoring jobs backed by a local SQLite queue.
+
+Uploaded files are stored under the jobs directory and scored in chunks by a pool of
+worker threads. Each finished chunk is written to its own part file and recorded in
+the database, so a job interrupted by an API restart resumes from the last chunk.
+"""
+
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+import pandas as pd
+
+# Running jobs whose heartbeat is older than this are assumed orphaned and re-queued
+STALE_SECONDS = 60
+HEARTBEAT_SECONDS = STALE_SECONDS / 4
+POLL_SECONDS = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    filename TEXT,
+    total_rows INTEGER NOT NULL,
+    processed_rows INTEGER NOT NULL DEFAULT 0,
+    chunks_done INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when the job was cancelled between chunks"""
+
+
+class JobInterrupted(Exception):
+    """Raised inside a worker when the queue is stopping, the job is re-queued"""
+
+
+class JobQueue:
+    """SQLite job queue with a pool of scoring threads"""
+
+    def __init__(self, jobs_dir: str, score_chunk: Callable[[pd.DataFrame], pd.DataFrame],
+                 validate_chunk: Optional[Callable[[pd.DataFrame], None]] = None,
+                 on_complete: Optional[Callable[[str], None]] = None,
+                 n_workers: int = 1, chunk_size: int = 5000):
+        self.jobs_dir = jobs_dir
+        self.db_path = os.path.join(jobs_dir, "jobs.db")
+        self.score_chunk = score_chunk
+        self.validate_chunk = validate_chunk
+        self.on_complete = on_complete
+        self.n_workers = n_workers
+        self.chunk_size = chunk_size
+        self._stop = threading.Event()
+        self._threads = []
+
+        os.makedirs(jobs_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def input_path(self, job_id: str) -> str:
+        return os.path.join(self._job_dir(job_id), "input.csv")
+
+    def result_path(self, job_id: str) -> str:
+        return os.path.join(self._job_dir(job_id), "result.csv")
+
+    def submit(self, input_file, filename: Optional[str] = None) -> str:
+        """
+        Store an uploaded CSV file object and queue it, returns the job ID.
+        Raises ValueError if the file cannot be parsed, has no rows or fails validation.
+        """
+        job_id = uuid.uuid4().hex
+        os.makedirs(self._job_dir(job_id), exist_ok=True)
+        with open(self.input_path(job_id), "wb") as f:
+            shutil.copyfileobj(input_file, f)
+
+        try:
+            total_rows = 0
+            for chunk in pd.read_csv(self.input_path(job_id), chunksize=self.chunk_size):
+                if total_rows == 0 and self.validate_chunk is not None:
+                    self.validate_chunk(chunk)
+                total_rows += len(chunk)
+            if total_rows == 0:
+                raise ValueError("File contains no rows")
+        except Exception as e:
+            shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+            raise ValueError(str(e)) from e
+
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, filename, total_rows, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, filename, total_rows, now, now)
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return the job row as a dict, or None if it does not exist"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """Cancel a queued job now, or ask the worker to stop a running one"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', updated_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (now, job_id)
+            )
+            conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated_at = ? "
+                "WHERE id = ? AND status = 'running'",
+                (now, job_id)
+            )
+        return self.get(job_id)
+
+    def _claim(self) -> Optional[dict]:
+        """Atomically take the oldest queued (or orphaned running) job"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ("
+                "  SELECT id FROM jobs"
+                "  WHERE status = 'queued' OR (status = 'running' AND updated_at < ?)"
+                "  ORDER BY created_at LIMIT 1"
+                ") RETURNING *",
+                (now, now - STALE_SECONDS)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def _finish(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id)
+            )
+
+    def _heartbeat(self, job_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    @contextmanager
+    def _keep_alive(self, job_id: str) -> Iterator[None]:
+        """Refresh the job heartbeat from a background thread while a long step runs"""
+        done = threading.Event()
+
+        def beat():
+            while not done.wait(HEARTBEAT_SECONDS):
+                self._heartbeat(job_id)
+
+        self._heartbeat(job_id)
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def _run(self, job: dict) -> None:
+        """Score a job chunk by chunk, skipping chunks finished before a restart"""
+        job_id = job["id"]
+        job_dir = self._job_dir(job_id)
+        chunks = pd.read_csv(self.input_path(job_id), chunksize=self.chunk_size)
+        n_chunks = 0
+
+        for index, chunk in enumerate(chunks):
+            n_chunks = index + 1
+            if index < job["chunks_done"]:
+                continue
+
+            current = self.get(job_id)
+            if current is None or current["cancel_requested"]:
+                raise JobCancelled()
+            if self._stop.is_set():
+                raise JobInterrupted()
+
+            scored = self.score_chunk(chunk)
+            scored.to_csv(os.path.join(job_dir, f"part_{index:06d}.csv"), index=False)
+
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE jobs SET chunks_done = ?, processed_rows = processed_rows + ?, "
+                    "updated_at = ? WHERE id = ?",
+                    (index + 1, len(chunk), time.time(), job_id)
+                )
+
+        parts = [os.path.join(job_dir, f"part_{index:06d}.csv") for index in range(n_chunks)]
+        result_path = self.result_path(job_id)
+        if not (job["chunks_done"] == n_chunks and os.path.exists(result_path)):
+            # Merge into a temporary file and rename it, so result.csv only ever
+            # exists complete and a restart after the merge does not need the parts
+            tmp_path = result_path + ".tmp"
+            with self._keep_alive(job_id), open(tmp_path, "w", newline="") as out:
+                for i, part in enumerate(parts):
+                    with open(part) as f:
+                        if i > 0:
+                            f.readline()  # Skip the repeated header
+                        shutil.copyfileobj(f, out)
+            os.replace(tmp_path, result_path)
+        for part in parts:
+            if os.path.exists(part):
+                os.remove(part)
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            job = self._claim()
+            if job is None:
+                self._stop.wait(POLL_SECONDS)
+                continue
+            try:
+                self._run(job)
+                if self.on_complete is not None:
+                    with self._keep_alive(job["id"]):
+                        self.on_complete(job["id"])
+                self._finish(job["id"], "completed")
+            except JobCancelled:
+                self._finish(job["id"], "cancelled")
+            except JobInterrupted:
+                self._finish(job["id"], "queued")
+            except Exception as e:
+                self._finish(job["id"], "failed", error=str(e))
+
+    def start(self) -> None:
+        """Start the worker threads"""
+        self._stop.clear()
+        for _ in range(self.n_workers):
+            thread = threading.Thread(target=self._worker, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """Stop the worker threads, running jobs resume on the next start"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
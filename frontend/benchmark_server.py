@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark the frontend server against the previous single-threaded server
+Run this file to print throughput and latency for both servers
+
+Both servers are started in-process on free ports and hit with concurrent
+clients requesting index.html over keep-alive connections (where supported).
+"""
+
+import functools
+import http.client
+import http.server
+import socketserver
+import threading
+import time
+import numpy as np
+
+from server import FRONTEND_DIR, create_server
+
+CLIENTS = 32
+REQUESTS_PER_CLIENT = 50
+HEADERS = {'Accept-Encoding': 'br, gzip'}
+
+class QuietLegacyHandler(http.server.SimpleHTTPRequestHandler):
+    """The original handler, without per-request logging"""
+
+    def log_message(self, format, *args):
+        pass
+
+def legacy_server():
+    """The original server: single-threaded TCPServer with SimpleHTTPRequestHandler"""
+    handler = functools.partial(QuietLegacyHandler, directory=str(FRONTEND_DIR))
+    return socketserver.TCPServer(("127.0.0.1", 0), handler)
+
+def threaded_server():
+    """The current server: threaded, precompressed, keep-alive"""
+    httpd = create_server(port=0)
+    httpd.RequestHandlerClass.log_message = lambda *args: None
+    return httpd
+
+def run_client(port, n_requests, latencies, errors):
+    """Fetch / repeatedly, reusing the connection while the server keeps it open"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        try:
+            conn.request("GET", "/", headers=HEADERS)
+            response = conn.getresponse()
+            response.read()
+            if response.will_close:
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            latencies.append((time.perf_counter() - start) * 1000)
+        except Exception:
+            errors.append(1)
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.close()
+
+def benchmark(name, httpd):
+    """Run the concurrent clients against a server and print the results"""
+    port = httpd.server_address[1]
+    server_thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    server_thread.start()
+
+    latencies, errors = [], []
+    clients = [
+        threading.Thread(target=run_client, args=(port, REQUESTS_PER_CLIENT, latencies, errors))
+        for _ in range(CLIENTS)
+    ]
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start
+
+    httpd.shutdown()
+    httpd.server_close()
+
+    print(f"{name:<10} {len(latencies) / elapsed:>10.1f} req/s  "
+          f"p50 {np.percentile(latencies, 50):>7.2f} ms  "
+          f"p99 {np.percentile(latencies, 99):>7.2f} ms  errors {len(errors)}")
+
+def main():
+    print(f"--- {CLIENTS} clients x {REQUESTS_PER_CLIENT} requests for index.html ---")
+    benchmark("legacy", legacy_server())
+    benchmark("threaded", threaded_server())
+
+if __name__ == "__main__":
+    main()
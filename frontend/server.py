@@ -1,44 +1,167 @@
 #!/usr/bin/env python3
 """
-Simple HTTP server to serve the frontend
+Threaded HTTP server for the frontend
 Run this file to start the frontend server
+
+Static assets are loaded and precompressed (gzip, and brotli when the `brotli`
+package is installed) once at startup, then served from memory with ETag,
+Cache-Control and HTTP/1.1 keep-alive support.
 """
 
+import gzip
+import hashlib
 import http.server
-import socketserver
+import mimetypes
 import webbrowser
-import os
 from pathlib import Path
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 # Configuration
 PORT = 3000
 FRONTEND_DIR = Path(__file__).parent
+STATIC_EXTENSIONS = {'.html', '.css', '.js', '.json', '.svg', '.png', '.ico', '.txt'}
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+# index.html must be revalidated so dashboard updates show up immediately,
+# other assets can be cached by the browser for an hour
+HTML_CACHE_CONTROL = 'no-cache'
+ASSET_CACHE_CONTROL = 'public, max-age=3600'
+
+class StaticAsset:
+    """A static file held in memory with its precompressed variants"""
+
+    def __init__(self, path):
+        self.body = path.read_bytes()
+        self.content_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        self.cache_control = HTML_CACHE_CONTROL if path.suffix == '.html' else ASSET_CACHE_CONTROL
+        self.etag = hashlib.sha256(self.body).hexdigest()[:16]
+
+        # encoding -> compressed body, only kept when it is actually smaller
+        self.variants = {}
+        if self.content_type.startswith(COMPRESSIBLE_TYPES):
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(self.body, quality=11)
+            self.variants['gzip'] = gzip.compress(self.body, compresslevel=9, mtime=0)
+            self.variants = {enc: data for enc, data in self.variants.items() if len(data) < len(self.body)}
+
+    def select(self, accept_encoding):
+        """Return (encoding, body, etag) for the client's Accept-Encoding header"""
+        qvalues = parse_accept_encoding(accept_encoding)
+        default_q = qvalues.get('*', 0.0)
+        best, best_q = None, 0.0
+        for encoding in ('br', 'gzip'):  # Preference order for equal q-values
+            q = qvalues.get(encoding, default_q)
+            if encoding in self.variants and q > best_q:
+                best, best_q = encoding, q
+
+        # Uncompressed is the fallback, it only wins over an accepted encoding
+        # when the client explicitly weights identity higher
+        if best is not None and best_q >= qvalues.get('identity', 0.0):
+            return best, self.variants[best], f'"{self.etag}-{best}"'
+        return None, self.body, f'"{self.etag}"'
+
+def parse_accept_encoding(header):
+    """Map each coding in an Accept-Encoding header to its q-value, q=0 means refused"""
+    qvalues = {}
+    for part in header.split(','):
+        coding, *params = [item.strip() for item in part.split(';')]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0  # Malformed weights are treated as refusals
+        qvalues[coding.lower()] = q
+    return qvalues
+
+def load_assets(directory):
+    """Load every static file under directory, keyed by URL path"""
+    assets = {}
+    for path in Path(directory).rglob('*'):
+        if path.is_file() and path.suffix in STATIC_EXTENSIONS:
+            url_path = '/' + path.relative_to(directory).as_posix()
+            assets[url_path] = StaticAsset(path)
+    if '/index.html' in assets:
+        assets['/'] = assets['/index.html']
+    return assets
+
+class CORSHTTPRequestHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP/1.1 request handler serving precompressed in-memory assets with CORS enabled"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive, every response sends Content-Length
+    # Headers and body are written separately, without this keep-alive responses
+    # stall ~40 ms on Nagle's algorithm + delayed ACKs
+    disable_nagle_algorithm = True
+    assets = {}
 
-class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
-    """HTTP Request Handler with CORS enabled"""
-    
     def end_headers(self):
         """Add CORS headers"""
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         super().end_headers()
-    
+
     def do_OPTIONS(self):
         """Handle preflight requests"""
         self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.send_asset(include_body=False)
+
+    def do_GET(self):
+        self.send_asset(include_body=True)
+
+    def send_asset(self, include_body):
+        """Send an asset, honouring Accept-Encoding and If-None-Match"""
+        path = self.path.split('?', 1)[0].split('#', 1)[0]
+        asset = self.assets.get(path)
+        if asset is None:
+            self.send_error(404, 'File not found')
+            return
+
+        encoding, body, etag = asset.select(self.headers.get('Accept-Encoding', ''))
+        if_none_match = self.headers.get('If-None-Match', '')
+        not_modified = etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match == '*'
+
+        self.send_response(304 if not_modified else 200)
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', asset.cache_control)
+        self.send_header('Vary', 'Accept-Encoding')
+        if not_modified:
+            self.end_headers()  # 304 responses never carry a body
+            return
+
+        self.send_header('Content-Type', asset.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if encoding is not None:
+            self.send_header('Content-Encoding', encoding)
         self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+def create_server(port=PORT, directory=FRONTEND_DIR):
+    """Create a threaded server with the assets of directory preloaded"""
+    handler = type('FrontendHandler', (CORSHTTPRequestHandler,), {'assets': load_assets(directory)})
+    return http.server.ThreadingHTTPServer(("", port), handler)
 
 def start_server():
     """Start the frontend server"""
-    # Change to frontend directory
-    os.chdir(FRONTEND_DIR)
-    
     # Create server
-    with socketserver.TCPServer(("", PORT), CORSHTTPRequestHandler) as httpd:
+    with create_server() as httpd:
         print(f"🚀 Frontend server starting...")
         print(f"📱 Server running at: http://localhost:{PORT}")
         print(f"📁 Serving files from: {FRONTEND_DIR}")
+        print(f"🗜️ Precompressed encodings: {'br, gzip' if brotli else 'gzip'}")
         print(f"🔗 API expected at: http://localhost:8000")
         print()
         print("💡 Instructions:")
@@ -46,16 +169,16 @@ def start_server():
         print("2. Open http://localhost:3000 in your browser")
         print("3. Use Ctrl+C to stop the server")
         print()
-        
+
         # Try to open browser automatically
         try:
             webbrowser.open(f'http://localhost:{PORT}')
             print("🌐 Opening browser...")
         except Exception:
             print("⚠️ Could not open browser automatically")
-        
+
         print(f"✅ Server ready! Press Ctrl+C to stop.")
-        
+
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
@@ -0,0 +1,303 @@
+import json
+import os
+import pandas as pd
+import numpy as np
+import xgboost as xgb
+import joblib
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_squared_error, r2_score
+
+from training_pipeline import (load_data, encode_features, handle_missing_values,
+                               remove_outliers, scale_features, model_size, measure_latency)
+
+# --- Configuration ---
+MODEL_PATH = "models/burnout_prediction_model.pkl"
+LOWER_MODEL_PATH = "models/lower_quantile_model.pkl"
+UPPER_MODEL_PATH = "models/upper_quantile_model.pkl"
+SCALER_PATH = "models/feature_scaler.pkl"
+
+COMPRESSED_MODEL_PATH = "models/compressed_burnout_prediction_model.pkl"
+COMPRESSED_LOWER_MODEL_PATH = "models/compressed_lower_quantile_model.pkl"
+COMPRESSED_UPPER_MODEL_PATH = "models/compressed_upper_quantile_model.pkl"
+
+# Maximum RMS change (in burn-rate units) that pruning may introduce per model
+PRUNE_TOLERANCE = 0.005
+# Leaf values are snapped to a uniform grid with 2**LEAF_BITS levels
+LEAF_BITS = 8
+# A compressed variant is only saved if it stays this close to the original
+MAX_R2_LOSS = 0.01
+MAX_COVERAGE_LOSS = 0.02
+# Student model used when distilling the ensembles
+STUDENT_PARAMS = {'max_depth': 4, 'n_estimators': 200, 'learning_rate': 0.1}
+
+# Per-node arrays of an XGBoost JSON tree, renumbered when a tree is rebuilt
+NODE_FIELDS = ['base_weights', 'default_left', 'left_children', 'loss_changes', 'parents',
+               'right_children', 'split_conditions', 'split_indices', 'split_type', 'sum_hessian']
+
+
+def _model_json(model):
+    """Return the JSON model document of a fitted XGBRegressor"""
+    return json.loads(model.get_booster().save_raw(raw_format='json'))
+
+
+def _model_from_json(model, doc, n_trees):
+    """Build a new XGBRegressor with the same params as `model` from a JSON document"""
+    params = model.get_params()
+    params['n_estimators'] = n_trees
+    compressed = xgb.XGBRegressor(**params)
+    compressed.load_model(bytearray(json.dumps(doc).encode()))
+    return compressed
+
+
+def _leaf_values(tree):
+    """Map leaf node id -> leaf value for one JSON tree"""
+    return {
+        node: value
+        for node, (left, value) in enumerate(zip(tree['left_children'], tree['split_conditions']))
+        if left == -1
+    }
+
+
+def tree_contributions(model, X):
+    """
+    Per-tree contribution matrix of shape (n_samples, n_trees).
+    Each column is the amount that tree adds to the prediction of each sample.
+    """
+    doc = _model_json(model)
+    trees = doc['learner']['gradient_booster']['model']['trees']
+    leaf_index = model.get_booster().predict(xgb.DMatrix(X), pred_leaf=True).astype(int)
+    leaf_index = leaf_index.reshape(len(X), -1)
+
+    contributions = np.empty(leaf_index.shape, dtype=np.float64)
+    for t, tree in enumerate(trees):
+        lookup = np.zeros(len(tree['left_children']))
+        for node, value in _leaf_values(tree).items():
+            lookup[node] = value
+        contributions[:, t] = lookup[leaf_index[:, t]]
+    return contributions
+
+
+def prune_trees(model, X, tolerance=PRUNE_TOLERANCE):
+    """
+    Remove the trees that contribute least to the ensemble.
+
+    Trees are visited in order of increasing mean absolute contribution and dropped
+    while the RMS deviation they cause (after folding their mean into the base
+    score) stays below `tolerance`.
+    """
+    contributions = tree_contributions(model, X)
+    order = np.argsort(np.abs(contributions).mean(axis=0))
+
+    removed = []
+    removed_sum = np.zeros(len(X))
+    for t in order:
+        candidate = removed_sum + contributions[:, t]
+        if np.std(candidate) > tolerance:
+            continue
+        removed.append(t)
+        removed_sum = candidate
+
+    doc = _model_json(model)
+    gbtree = doc['learner']['gradient_booster']['model']
+    removed_set = set(removed)
+    kept = [tree for t, tree in enumerate(gbtree['trees']) if t not in removed_set]
+    for new_id, tree in enumerate(kept):
+        tree['id'] = new_id
+
+    gbtree['trees'] = kept
+    gbtree['tree_info'] = [0] * len(kept)
+    gbtree['iteration_indptr'] = list(range(len(kept) + 1))
+    gbtree['gbtree_model_param']['num_trees'] = str(len(kept))
+
+    # Removed trees still shift predictions by their mean, keep that in the bias
+    params = doc['learner']['learner_model_param']
+    # XGBoost only parses float32-precision literals here, longer ones reset to 0.5
+    params['base_score'] = f"{float(params['base_score']) + removed_sum.mean():.8E}"
+
+    return _model_from_json(model, doc, len(kept)), len(removed)
+
+
+def _rebuild_tree(tree, new_leaves):
+    """Rebuild a JSON tree turning the nodes in `new_leaves` (id -> value) into leaves"""
+    old_to_new = {}
+    queue = [0]
+    order = []
+    while queue:
+        node = queue.pop(0)
+        old_to_new[node] = len(order)
+        order.append(node)
+        if node not in new_leaves and tree['left_children'][node] != -1:
+            queue.extend([tree['left_children'][node], tree['right_children'][node]])
+
+    rebuilt = {field: [tree[field][node] for node in order] for field in NODE_FIELDS}
+    for i, node in enumerate(order):
+        if node in new_leaves:
+            rebuilt['left_children'][i] = -1
+            rebuilt['right_children'][i] = -1
+            rebuilt['split_indices'][i] = 0
+            rebuilt['split_type'][i] = 0
+            rebuilt['default_left'][i] = 0
+            rebuilt['loss_changes'][i] = 0.0
+            rebuilt['split_conditions'][i] = new_leaves[node]
+            rebuilt['base_weights'][i] = new_leaves[node]
+        elif rebuilt['left_children'][i] != -1:
+            rebuilt['left_children'][i] = old_to_new[rebuilt['left_children'][i]]
+            rebuilt['right_children'][i] = old_to_new[rebuilt['right_children'][i]]
+        if i > 0:
+            rebuilt['parents'][i] = old_to_new[rebuilt['parents'][i]]
+
+    tree.update(rebuilt)
+    tree['tree_param']['num_nodes'] = str(len(order))
+    tree['tree_param']['num_deleted'] = '0'
+    return tree
+
+
+def quantize_leaves(model, n_bits=LEAF_BITS):
+    """
+    Snap every leaf value to a uniform grid with 2**n_bits levels, then merge
+    sibling leaves that end up with the same value into their parent.
+    """
+    doc = _model_json(model)
+    gbtree = doc['learner']['gradient_booster']['model']
+
+    all_leaves = [v for tree in gbtree['trees'] for v in _leaf_values(tree).values()]
+    low, high = min(all_leaves), max(all_leaves)
+    step = (high - low) / (2 ** n_bits - 1) if high > low else 1.0
+
+    merged = 0
+    for tree in gbtree['trees']:
+        values = {node: low + round((v - low) / step) * step for node, v in _leaf_values(tree).items()}
+
+        # Collapse bottom-up so merged parents can merge again with their siblings
+        changed = True
+        while changed:
+            changed = False
+            for node in range(len(tree['left_children'])):
+                left, right = tree['left_children'][node], tree['right_children'][node]
+                if node in values or left == -1:
+                    continue
+                if left in values and right in values and values[left] == values[right]:
+                    values[node] = values.pop(left)
+                    values.pop(right)
+                    merged += 1
+                    changed = True
+
+        _rebuild_tree(tree, values)
+
+    return _model_from_json(model, doc, len(gbtree['trees'])), merged
+
+
+def distill_model(model, X_train, params=STUDENT_PARAMS):
+    """Train a smaller student XGBRegressor to mimic the predictions of `model`"""
+    student = xgb.XGBRegressor(
+        objective='reg:squarederror',
+        booster='gbtree',
+        random_state=42,
+        **params
+    )
+    student.fit(X_train, model.predict(X_train))
+    return student
+
+
+def compress_model(model, X_train, tolerance=PRUNE_TOLERANCE, n_bits=LEAF_BITS):
+    """Prune low-contribution trees, then quantize and merge leaves"""
+    pruned, n_removed = prune_trees(model, X_train, tolerance)
+    compressed, n_merged = quantize_leaves(pruned, n_bits)
+    print(f"  Removed {n_removed} trees, merged {n_merged} leaf pairs")
+    return compressed
+
+
+def evaluate_variant(name, model, lower_model, upper_model, X_val, y_val):
+    """Accuracy, interval coverage, latency and size of one (model, lower, upper) triple"""
+    preds = np.clip(model.predict(X_val), 0, 1)
+    lower_preds = lower_model.predict(X_val)
+    upper_preds = upper_model.predict(X_val)
+
+    report = {
+        'variant': name,
+        'r2': r2_score(y_val, preds),
+        'rmse': np.sqrt(mean_squared_error(y_val, preds)),
+        'coverage': np.mean((y_val >= lower_preds) & (y_val <= upper_preds)),
+        'mean_width': np.mean(np.abs(upper_preds - lower_preds)),
+        'n_trees': sum(m.get_booster().num_boosted_rounds() for m in (model, lower_model, upper_model)),
+        'size_kb': sum(model_size(m) for m in (model, lower_model, upper_model)) / 1024,
+    }
+    # Latency of a full request: all three models are evaluated per prediction
+    for key, value in measure_latency(model, X_val).items():
+        report[key] = value
+    for m in (lower_model, upper_model):
+        for key, value in measure_latency(m, X_val).items():
+            report[key] += value
+    return report
+
+
+def load_validation_split(train_path="input/train.csv", test_path="input/test.csv"):
+    """Recreate the training/validation split used by training_pipeline.py"""
+    scaler = joblib.load(SCALER_PATH)
+    train, _ = load_data(train_path, test_path)
+    train = train.dropna(subset=['Burn Rate']).reset_index(drop=True)
+
+    # Same steps as preprocess_data(is_train=True), but reusing the fitted scaler
+    # so the saved feature_scaler.pkl is not overwritten
+    train_processed = handle_missing_values(encode_features(train))
+    train_processed = remove_outliers(train_processed, ['Resource Allocation', 'Mental Fatigue Score'])
+    train_processed, _ = scale_features(train_processed, scaler=scaler, is_train=False)
+
+    X = train_processed.drop('Burn Rate', axis=1)
+    y = train_processed['Burn Rate']
+
+    return train_test_split(X, y, test_size=0.2, shuffle=True, random_state=42)
+
+
+def main(distill=True):
+    """Compress the saved models and report the trade-off against the originals"""
+    print("--- Starting Model Compression ---")
+    try:
+        model = joblib.load(MODEL_PATH)
+        lower_model = joblib.load(LOWER_MODEL_PATH)
+        upper_model = joblib.load(UPPER_MODEL_PATH)
+    except FileNotFoundError as e:
+        print(f"❌ Error loading models: {e}. Run training_pipeline.py first.")
+        return
+
+    X_train, X_val, y_train, y_val = load_validation_split()
+
+    variants = {'original': (model, lower_model, upper_model)}
+
+    print("Pruning and quantizing ensembles...")
+    variants['compressed'] = tuple(compress_model(m, X_train) for m in variants['original'])
+
+    if distill:
+        print("Distilling ensembles into student models...")
+        variants['distilled'] = tuple(distill_model(m, X_train) for m in variants['original'])
+
+    print("Evaluating variants...")
+    report = pd.DataFrame([
+        evaluate_variant(name, *models, X_val, y_val) for name, models in variants.items()
+    ])
+    print("\n=== COMPRESSION REPORT ===")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    # Serve the smallest candidate that stays within tolerance of the original
+    original = report.iloc[0]
+    candidates = report[
+        (report['variant'] != 'original')
+        & (report['r2'] >= original['r2'] - MAX_R2_LOSS)
+        & (report['coverage'] >= original['coverage'] - MAX_COVERAGE_LOSS)
+    ]
+    if candidates.empty:
+        print("\n⚠️ No compressed variant within tolerance of the original, nothing saved.")
+        return report
+    best = candidates.sort_values('size_kb').iloc[0]['variant']
+
+    os.makedirs("models", exist_ok=True)
+    for m, path in zip(variants[best], (COMPRESSED_MODEL_PATH, COMPRESSED_LOWER_MODEL_PATH,
+                                        COMPRESSED_UPPER_MODEL_PATH)):
+        joblib.dump(m, path)
+    print(f"\n✅ Saved '{best}' models to models/compressed_*.pkl")
+    print("   Start the API with BEAM_MODEL_VARIANT=compressed to serve them.")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Indexed store of scoring runs for fast "who is at risk" queries.
+
+Every scoring run (training pipeline test set, background API jobs) is recorded with
+its model version and timestamp, and each prediction is keyed by Employee ID. A run
+is only marked completed once all of its rows are stored, and queries default to the
+latest completed run of a source, so partial and ad-hoc runs never become the
+default answer. Indexes
+on (run, risk category, burn rate) and (run, burn rate) serve top-K and range queries
+in burn rate order, (run, [risk category,] confidence, burn rate) serve selective
+confidence filters and (employee, run) serves per-employee history, keeping queries
+in the millisecond range on millions of rows.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model_version TEXT NOT NULL,
+    source TEXT,
+    n_rows INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    scored_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS predictions (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    employee_id TEXT NOT NULL,
+    predicted_burn_rate REAL NOT NULL,
+    lower_bound REAL,
+    upper_bound REAL,
+    confidence_score REAL,
+    risk_category TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_risk ON predictions (run_id, risk_category, predicted_burn_rate);
+CREATE INDEX IF NOT EXISTS idx_predictions_burn_rate ON predictions (run_id, predicted_burn_rate);
+DROP INDEX IF EXISTS idx_predictions_confidence;
+CREATE INDEX IF NOT EXISTS idx_predictions_confidence_burn_rate ON predictions (run_id, confidence_score, predicted_burn_rate);
+CREATE INDEX IF NOT EXISTS idx_predictions_risk_confidence ON predictions (run_id, risk_category, confidence_score, predicted_burn_rate);
+CREATE INDEX IF NOT EXISTS idx_predictions_employee ON predictions (employee_id, run_id);
+"""
+
+# Runs recorded by the training pipeline, the default for per-run queries
+DEFAULT_SOURCE = "training_pipeline"
+
+# Columns of a scored DataFrame, as written by the API jobs, mapped to store columns
+FRAME_COLUMNS = {
+    'Employee ID': 'employee_id',
+    'Predicted_Burn_Rate': 'predicted_burn_rate',
+    'Lower_Bound': 'lower_bound',
+    'Upper_Bound': 'upper_bound',
+    'Confidence_Score': 'confidence_score',
+    'Risk_Category': 'risk_category'
+}
+
+SELECT_PREDICTIONS = (
+    "SELECT p.employee_id, p.run_id, r.model_version, r.scored_at, p.predicted_burn_rate, "
+    "p.lower_bound, p.upper_bound, p.confidence_score, p.risk_category "
+    "FROM predictions p JOIN runs r ON r.run_id = p.run_id "
+)
+
+# Index entries sampled per index by ANALYZE after each run
+ANALYSIS_LIMIT = 10000
+
+# Confidence filters are counted on their index up to this many matches, below it the
+# exact selectivity is passed to the query planner with likelihood()
+CONFIDENCE_PROBE_ROWS = 10000
+
+
+def model_version(model_path):
+    """Short content hash identifying a saved model file"""
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class PredictionStore:
+    """SQLite store of scoring runs and per-employee predictions"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            columns = [row["name"] for row in conn.execute("PRAGMA table_info(runs)")]
+            if columns and "completed" not in columns:
+                # Stores created before runs had a completed flag, treat their runs as complete
+                conn.execute("ALTER TABLE runs ADD COLUMN completed INTEGER NOT NULL DEFAULT 1")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=-262144")  # 256 MB, speeds up bulk index inserts
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def start_run(self, model_version: str, source: Optional[str] = None) -> int:
+        """Register a new scoring run and return its ID, call complete_run once all rows are added"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO runs (model_version, source, completed, scored_at) VALUES (?, ?, 0, ?)",
+                (model_version, source, time.time())
+            )
+            return cursor.lastrowid
+
+    def add_predictions(self, run_id: int, predictions: pd.DataFrame) -> None:
+        """
+        Append scored rows to a run. `predictions` uses the scored CSV column names
+        ('Employee ID', 'Predicted_Burn_Rate', ...); bounds and confidence are optional.
+        """
+        if 'Employee ID' not in predictions.columns:
+            raise ValueError("Predictions must include an 'Employee ID' column")
+
+        frame = predictions.rename(columns=FRAME_COLUMNS)
+        for column in FRAME_COLUMNS.values():
+            if column not in frame.columns:
+                frame[column] = None
+        frame = frame[list(FRAME_COLUMNS.values())].astype({
+            'employee_id': str,
+            'predicted_burn_rate': float,
+            'lower_bound': float,
+            'upper_bound': float,
+            'confidence_score': float
+        })
+        frame = frame.astype(object).where(frame.notna(), None)
+
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO predictions (run_id, employee_id, predicted_burn_rate, lower_bound, "
+                "upper_bound, confidence_score, risk_category) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((run_id, *row) for row in frame.itertuples(index=False, name=None))
+            )
+            conn.execute("UPDATE runs SET n_rows = n_rows + ? WHERE run_id = ?",
+                         (len(frame), run_id))
+
+    def complete_run(self, run_id: int) -> None:
+        """Mark a run as fully stored, making it visible to the default queries"""
+        with self._connect() as conn:
+            # Refresh the query planner statistics after the bulk load, sampling each
+            # index so the cost does not grow with every run ever stored
+            conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+            conn.execute("ANALYZE predictions")
+            conn.execute("UPDATE runs SET completed = 1 WHERE run_id = ?", (run_id,))
+
+    def record_run(self, predictions: pd.DataFrame, model_version: str,
+                   source: Optional[str] = None) -> int:
+        """Store a complete scoring run in one call, returns the run ID"""
+        run_id = self.start_run(model_version, source)
+        self.add_predictions(run_id, predictions)
+        self.complete_run(run_id)
+        return run_id
+
+    def runs(self, limit: int = 50) -> list:
+        """Most recent scoring runs first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM runs ORDER BY run_id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def latest_run_id(self, source: str = DEFAULT_SOURCE) -> Optional[int]:
+        """ID of the most recent completed run from source"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT MAX(run_id) FROM runs WHERE completed = 1 AND source = ?", (source,)
+            ).fetchone()[0]
+
+    def _filters(self, run_id, source, risk_category, min_confidence):
+        """WHERE clauses shared by the per-run queries"""
+        where, params = ["p.run_id = ?"], [run_id if run_id is not None else self.latest_run_id(source)]
+        if risk_category is not None:
+            where.append("p.risk_category = ?")
+            params.append(risk_category)
+        if min_confidence is not None:
+            term = "p.confidence_score >= ?"
+            selectivity = self._confidence_selectivity(where, params, min_confidence,
+                                                       risk_category is not None)
+            if selectivity is not None:
+                # Exponent notation keeps the literal a real, likelihood() rejects an integer 1
+                term = f"likelihood({term}, {min(selectivity, 1.0):.6e})"
+            where.append(term)
+            params.append(min_confidence)
+        return where, params
+
+    def _confidence_selectivity(self, where: list, params: list, min_confidence: float,
+                                by_risk: bool) -> Optional[float]:
+        """
+        Fraction of the run's rows passing the confidence filter, or None if more than
+        CONFIDENCE_PROBE_ROWS do. Without STAT4 SQLite assumes a range matches a quarter
+        of the rows, which makes it walk the burn rate order past every row of a highly
+        selective filter; counting the matches on the confidence index first is cheap.
+        """
+        index = "idx_predictions_risk_confidence" if by_risk else "idx_predictions_confidence_burn_rate"
+        with self._connect() as conn:
+            matches, n_rows = conn.execute(
+                f"SELECT COUNT(*), (SELECT n_rows FROM runs WHERE run_id = ?) FROM ("
+                f"  SELECT 1 FROM predictions p INDEXED BY {index}"
+                f"  WHERE {' AND '.join(where)} AND p.confidence_score >= ? LIMIT ?"
+                f")",
+                (params[0], *params, min_confidence, CONFIDENCE_PROBE_ROWS + 1)
+            ).fetchone()
+        if matches > CONFIDENCE_PROBE_ROWS or not n_rows:
+            return None
+        return max(matches, 1) / n_rows
+
+    def _query(self, where: list, params: list, order_by: str, limit: int) -> list:
+        sql = SELECT_PREDICTIONS
+        if where:
+            sql += "WHERE " + " AND ".join(where) + " "
+        sql += f"ORDER BY {order_by} LIMIT ?"
+        with self._connect() as conn:
+            rows = conn.execute(sql, (*params, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def top_at_risk(self, k: int = 50, run_id: Optional[int] = None,
+                    risk_category: Optional[str] = None,
+                    min_confidence: Optional[float] = None,
+                    source: str = DEFAULT_SOURCE) -> list:
+        """
+        Employees with the highest predicted burn rate in a run,
+        the latest completed run from source unless run_id is given
+        """
+        where, params = self._filters(run_id, source, risk_category, min_confidence)
+        return self._query(where, params, "p.predicted_burn_rate DESC", k)
+
+    def in_range(self, min_burn_rate: float = 0.0, max_burn_rate: float = 1.0,
+                 run_id: Optional[int] = None, risk_category: Optional[str] = None,
+                 min_confidence: Optional[float] = None, limit: int = 1000,
+                 source: str = DEFAULT_SOURCE) -> list:
+        """Predictions with a burn rate in [min_burn_rate, max_burn_rate] in a run"""
+        where, params = self._filters(run_id, source, risk_category, min_confidence)
+        where.append("p.predicted_burn_rate BETWEEN ? AND ?")
+        params.extend([min_burn_rate, max_burn_rate])
+        return self._query(where, params, "p.predicted_burn_rate DESC", limit)
+
+    def employee_history(self, employee_id: str, limit: int = 100) -> list:
+        """All predictions for one employee in completed runs, newest run first"""
+        return self._query(["p.employee_id = ?", "r.completed = 1"], [employee_id], "p.run_id DESC", limit)
@@ -0,0 +1,117 @@
+"""
+Central CPU budget for training and serving.
+
+XGBoost, scikit-learn/BLAS and uvicorn otherwise each size their own thread pools,
+which oversubscribes the machine when several API workers and a retrain share it.
+All thread counts are derived from one budget, configured through environment variables:
+
+- BEAM_CPU_BUDGET: cores BEAM may use in total (default: all cores)
+- BEAM_SERVING_FRACTION: share of the budget reserved for the API (default: 0.5)
+- BEAM_API_WORKERS: uvicorn worker processes actually started (default: WEB_CONCURRENCY,
+  which uvicorn and gunicorn also read for their worker count, else 1)
+- BEAM_SMALL_BATCH_ROWS: batches below this size are predicted single-threaded
+  (default: half of the largest /predict/batch request)
+- BEAM_JOB_WORKERS: background scoring threads per API worker (default: 1)
+- BEAM_PIN_CPUS: set to 1 to pin serving and training to disjoint cores (Linux only)
+"""
+
+import os
+
+CPU_BUDGET = int(os.environ.get("BEAM_CPU_BUDGET", os.cpu_count() or 1))
+SERVING_FRACTION = float(os.environ.get("BEAM_SERVING_FRACTION", 0.5))
+# Largest request /predict/batch accepts
+MAX_BATCH_ROWS = 100
+SMALL_BATCH_ROWS = int(os.environ.get("BEAM_SMALL_BATCH_ROWS", MAX_BATCH_ROWS // 2))
+JOB_WORKERS = int(os.environ.get("BEAM_JOB_WORKERS", 1))
+PIN_CPUS = os.environ.get("BEAM_PIN_CPUS", "0") == "1"
+
+BLAS_THREAD_VARS = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                    "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS"]
+
+
+def _serving_share():
+    """Cores of the budget set aside for serving, may be 0 on a training-only box"""
+    return min(CPU_BUDGET, round(CPU_BUDGET * SERVING_FRACTION))
+
+
+def serving_cpus():
+    """Cores reserved for the API"""
+    return max(1, _serving_share())
+
+
+def training_cpus():
+    """Cores left for training once serving has its share"""
+    return max(1, CPU_BUDGET - _serving_share())
+
+
+def api_workers():
+    """
+    Number of uvicorn worker processes sharing the serving cores. Read at call time
+    so a launcher can export the count it starts (see set_api_workers).
+    """
+    workers = os.environ.get("BEAM_API_WORKERS") or os.environ.get("WEB_CONCURRENCY") or 1
+    return max(1, int(workers))
+
+
+def set_api_workers(n_workers):
+    """Record the number of worker processes a launcher is about to start"""
+    os.environ["BEAM_API_WORKERS"] = str(n_workers)
+
+
+def threads_per_worker():
+    """Threads each API worker may use for a large batch"""
+    return max(1, serving_cpus() // api_workers())
+
+
+def prediction_threads(n_rows):
+    """Threads to use for predicting `n_rows` rows in an API worker"""
+    if n_rows < SMALL_BATCH_ROWS:
+        return 1
+    return threads_per_worker()
+
+
+def job_workers():
+    """Background scoring threads per API worker"""
+    return max(1, JOB_WORKERS)
+
+
+def limit_threads(n_threads):
+    """Cap BLAS/OpenMP thread pools of this process (and of its children)"""
+    for var in BLAS_THREAD_VARS:
+        os.environ[var] = str(n_threads)
+
+    # Env vars only affect libraries loaded afterwards, threadpoolctl covers the rest
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=n_threads)
+    except ImportError:
+        pass
+
+
+def pin_cpus(role):
+    """Pin this process to the serving or training cores when BEAM_PIN_CPUS=1"""
+    if not PIN_CPUS or not hasattr(os, "sched_setaffinity"):
+        return
+
+    available = sorted(os.sched_getaffinity(0))[:CPU_BUDGET]
+    if role == "serving":
+        cores = available[:serving_cpus()]
+    else:
+        cores = available[_serving_share():] or available[-1:]
+    os.sched_setaffinity(0, cores)
+
+
+def configure_serving():
+    """Apply the serving budget to an API worker and return its prediction thread count"""
+    threads = threads_per_worker()
+    limit_threads(threads)
+    pin_cpus("serving")
+    return threads
+
+
+def configure_training():
+    """Apply the training budget to this process and return its thread count"""
+    threads = training_cpus()
+    limit_threads(threads)
+    pin_cpus("training")
+    return threads
@@ -0,0 +1,73 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from prediction_store import PredictionStore
+
+RISK_CATEGORIES = ['Low Risk', 'Medium Risk', 'High Risk']
+
+def make_predictions(n_rows, min_confidence=0.0, seed=0):
+    """Random scored rows shaped like the API job output"""
+    rng = np.random.default_rng(seed)
+    burn_rates = rng.random(n_rows)
+    return pd.DataFrame({
+        'Employee ID': [f"emp{i:06d}" for i in range(n_rows)],
+        'Predicted_Burn_Rate': burn_rates,
+        'Lower_Bound': burn_rates - 0.1,
+        'Upper_Bound': burn_rates + 0.1,
+        'Confidence_Score': rng.uniform(min_confidence, 1.0, n_rows),
+        'Risk_Category': rng.choice(RISK_CATEGORIES, n_rows)
+    })
+
+def check(name, condition):
+    print(f"{'✅' if condition else '❌'} {name}")
+    return condition
+
+def validate_prediction_store():
+    """
+    Validates the per-run queries of the prediction store, including confidence filters
+    that match every row of a small run (whose likelihood() hint rounds up to 1)
+    """
+    print("--- Starting Prediction Store Validation ---")
+    passed = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PredictionStore(os.path.join(tmp, "predictions.db"))
+        df = make_predictions(500, min_confidence=0.6)
+        run_id = store.record_run(df, "validation", source="training_pipeline")
+
+        # Confidence filters matching all, most and none of the rows
+        for min_confidence in (0.1, 0.5, 0.6, 0.99, 1.0):
+            expected = df[df['Confidence_Score'] >= min_confidence]
+            top = store.top_at_risk(5, min_confidence=min_confidence)
+            passed &= check(
+                f"top_at_risk(min_confidence={min_confidence}) returns the top rows",
+                [row['employee_id'] for row in top] ==
+                list(expected.nlargest(5, 'Predicted_Burn_Rate')['Employee ID'])
+            )
+
+            for risk in RISK_CATEGORIES:
+                in_range = store.in_range(0.0, 1.0, risk_category=risk, min_confidence=min_confidence)
+                passed &= check(
+                    f"in_range({risk!r}, min_confidence={min_confidence}) returns every match",
+                    len(in_range) == (expected['Risk_Category'] == risk).sum()
+                )
+
+        # Tiny job-sized run where every row passes the filter
+        small_run = store.start_run("validation", source="job:small")
+        store.add_predictions(small_run, make_predictions(2, min_confidence=0.5, seed=1))
+        passed &= check("Incomplete runs are not queried by default",
+                        store.top_at_risk(5, source="job:small") == [])
+        store.complete_run(small_run)
+        passed &= check("Two-row run with min_confidence=0.1 returns both rows",
+                        len(store.top_at_risk(5, source="job:small", min_confidence=0.1)) == 2)
+        passed &= check("Default source still queries the training run",
+                        {row['run_id'] for row in store.top_at_risk(5)} == {run_id})
+
+    print("--- Prediction Store Validation", "Passed ---" if passed else "Failed ---")
+    return passed
+
+if __name__ == "__main__":
+    raise SystemExit(0 if validate_prediction_store() else 1)